@@ -1,19 +1,38 @@
 import streamlit as st
-import os
-import tempfile
-from pathlib import Path
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 
 # Haystack Components
 from haystack import Pipeline
-from haystack.components.converters import PyPDFToDocument
-from haystack.components.preprocessors import DocumentSplitter, DocumentCleaner
+from haystack.components.preprocessors import DocumentSplitter
 from haystack.components.writers import DocumentWriter
 from haystack.components.builders.prompt_builder import PromptBuilder
 from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
-from haystack_integrations.components.embedders.ollama import OllamaDocumentEmbedder, OllamaTextEmbedder
-from haystack_integrations.components.generators.ollama import OllamaGenerator
 from haystack_integrations.components.retrievers.qdrant import QdrantEmbeddingRetriever
 
+# Custom Components
+from components import (
+    AddSectionHeader,
+    BatchedOllamaDocumentEmbedder,
+    CachedChunks,
+    ChunkCache,
+    DedupeBySHA256,
+    EMBED_BACKEND,
+    EmbeddingCache,
+    FastDocumentCleaner,
+    FastJoiner,
+    ParallelPyPDFToDocument,
+    PotionDocumentEmbedder,
+    PotionTextEmbedder,
+    QDRANT_COLLECTION_CONFIG,
+    ReplicateEmbeddings,
+    SharedClientOllamaGenerator,
+    SharedClientOllamaTextEmbedder,
+    StoreChunks,
+    create_ollama_http_client,
+)
+
 # ==========================================
 # 1. Page Configuration
 # ==========================================
@@ -35,25 +54,71 @@ def get_document_store():
     return QdrantDocumentStore(
         url="http://localhost:6333",
         index="my_paper_db",
-        embedding_dim=768,
         # recreate_index=False means we keep existing data, don't wipe it every time
-        recreate_index=False 
+        recreate_index=False,
+        # Embedding size (768 nomic-embed-text, 256 potion), int8 quantization and on-disk layout
+        **QDRANT_COLLECTION_CONFIG
     )
 
+@st.cache_resource
+def get_http_client():
+    # One connection pool for every Ollama call, kept across reruns and sessions:
+    # no new TCP handshakes per question or per indexing run
+    return create_ollama_http_client("http://localhost:11434")
+
+@st.cache_resource
+def get_embedding_cache():
+    # Re-uploading a paper (or a revised version) reuses the embeddings of unchanged chunks
+    return EmbeddingCache("./cache/embeddings.sqlite3")
+
+@st.cache_resource
+def get_chunk_cache():
+    # Loads the list of cached PDFs once instead of on every Streamlit rerun
+    return ChunkCache("./cache/chunks")
+
 @st.cache_resource
 def get_indexing_pipeline(_document_store):
     """Create Indexing Pipeline (Process PDFs)"""
     pipeline = Pipeline()
-    pipeline.add_component("converter", PyPDFToDocument())
-    pipeline.add_component("cleaner", DocumentCleaner(remove_empty_lines=True, remove_extra_whitespaces=True))
+    # PDFs that were split before skip the converter, cleaner and splitter entirely
+    pipeline.add_component("chunk_cache", CachedChunks(get_chunk_cache(), split_length=250, split_overlap=50))
+    pipeline.add_component("converter", ParallelPyPDFToDocument())
+    pipeline.add_component("cleaner", FastDocumentCleaner(remove_empty_lines=True, remove_extra_whitespaces=True))
     pipeline.add_component("splitter", DocumentSplitter(split_by="word", split_length=250, split_overlap=50))
-    pipeline.add_component("embedder", OllamaDocumentEmbedder(model="nomic-embed-text", url="http://localhost:11434"))
+    # Embeds "Section: <heading>" with each chunk; the prompt uses the original text from meta["raw"]
+    pipeline.add_component("section_header", AddSectionHeader())
+    pipeline.add_component("store_chunks", StoreChunks(get_chunk_cache()))
+    pipeline.add_component("chunks", FastJoiner())
+    # Overlapping windows and repeated headers/footers yield identical chunks: embed each text only once
+    pipeline.add_component("dedupe", DedupeBySHA256())
+    if EMBED_BACKEND == "potion":
+        pipeline.add_component("embedder", PotionDocumentEmbedder(model="minishlab/potion-base-8M"))
+    else:
+        pipeline.add_component("embedder", BatchedOllamaDocumentEmbedder(
+            model="nomic-embed-text",
+            url="http://localhost:11434",
+            keep_alive="30m",
+            cache=get_embedding_cache(),
+            client=get_http_client()
+        ))
+    pipeline.add_component("replicate", ReplicateEmbeddings())
     pipeline.add_component("writer", DocumentWriter(document_store=_document_store))
 
+    pipeline.connect("chunk_cache.sources", "converter.sources")
+    pipeline.connect("chunk_cache.meta", "converter.meta")
     pipeline.connect("converter", "cleaner")
     pipeline.connect("cleaner", "splitter")
-    pipeline.connect("splitter", "embedder")
-    pipeline.connect("embedder", "writer")
+    pipeline.connect("cleaner", "section_header.sources")
+    pipeline.connect("splitter", "section_header.documents")
+    pipeline.connect("section_header", "store_chunks")
+    # Cached and freshly split chunks meet here
+    pipeline.connect("chunk_cache.documents", "chunks")
+    pipeline.connect("store_chunks", "chunks")
+    pipeline.connect("chunks", "dedupe")
+    pipeline.connect("dedupe.documents", "embedder.documents")
+    pipeline.connect("dedupe.duplicates", "replicate.duplicates")
+    pipeline.connect("embedder.documents", "replicate.documents")
+    pipeline.connect("replicate", "writer")
     return pipeline
 
 @st.cache_resource
@@ -65,7 +130,7 @@ def get_rag_pipeline(_document_store):
 
     [Context]:
     {% for document in documents %}
-        {{ document.content }}
+        {{ document.meta.get("raw", document.content) }}
     {% endfor %}
 
     User Question: {{ question }}
@@ -73,22 +138,62 @@ def get_rag_pipeline(_document_store):
     """
     
     pipeline = Pipeline()
-    pipeline.add_component("text_embedder", OllamaTextEmbedder(model="nomic-embed-text", url="http://localhost:11434"))
-    # Note: Keep top_k=5 and use phi3 for speed
-    pipeline.add_component("retriever", QdrantEmbeddingRetriever(document_store=_document_store, top_k=3))
+    # keep_alive="30m" keeps both models loaded in Ollama between chat turns
+    if EMBED_BACKEND == "potion":
+        pipeline.add_component("text_embedder", PotionTextEmbedder(model="minishlab/potion-base-8M"))
+    else:
+        pipeline.add_component("text_embedder", SharedClientOllamaTextEmbedder(
+            model="nomic-embed-text", url="http://localhost:11434", keep_alive="30m", client=get_http_client()
+        ))
+    # Note: Section-aware chunks retrieve precisely enough that top_k=2 suffices; a shorter prompt keeps phi3 fast
+    pipeline.add_component("retriever", QdrantEmbeddingRetriever(document_store=_document_store, top_k=2))
     pipeline.add_component("prompt_builder", PromptBuilder(template=template))
-    pipeline.add_component("llm", OllamaGenerator(model="phi3", url="http://localhost:11434", timeout=360)) 
+    # Q4_K_M quantized Phi-3 (pull it first: `ollama pull phi3:3.8b-mini-4k-instruct-q4_K_M`);
+    # num_ctx fits the 2 retrieved chunks + question + answer, num_batch raises prompt-processing throughput
+    pipeline.add_component("llm", SharedClientOllamaGenerator(
+        model="phi3:3.8b-mini-4k-instruct-q4_K_M",
+        url="http://localhost:11434",
+        # No timeout here: requests go through the shared client, whose 300 s read timeout applies
+        keep_alive="30m",
+        generation_kwargs={"num_ctx": 2048, "num_batch": 512},
+        client=get_http_client()
+    ))
 
     pipeline.connect("text_embedder.embedding", "retriever.query_embedding")
     pipeline.connect("retriever", "prompt_builder.documents")
     pipeline.connect("prompt_builder", "llm")
+
+    # Warm up: load both models now, so the first question doesn't pay the cold start
+    try:
+        pipeline.get_component("text_embedder").run(text="warmup")
+        pipeline.get_component("llm").run(prompt="warmup", generation_kwargs={"num_predict": 1})
+    except Exception:
+        # Ollama not reachable yet; the first question will load the models instead
+        pass
     return pipeline
 
+@st.cache_resource
+def get_llm_executor():
+    # Worker threads for LLM generation, so the Streamlit script thread only handles rendering
+    return ThreadPoolExecutor(max_workers=4)
+
 # Load resources
 doc_store = get_document_store()
 indexing_pipeline = get_indexing_pipeline(doc_store)
 rag_pipeline = get_rag_pipeline(doc_store)
 
+# The RAG components are called step by step so the question embedding and the retrieval
+# can be cached per question; only the LLM call runs on every turn (its answers may vary).
+@st.cache_data(max_entries=256, show_spinner=False)
+def embed_question(text):
+    return rag_pipeline.get_component("text_embedder").run(text=text)["embedding"]
+
+# The collection may be re-indexed by index_pdf.py while the app runs: the document count is part of
+# the cache key, and the TTL covers a re-index that happens to keep the same count
+@st.cache_data(max_entries=256, ttl=600, show_spinner=False)
+def retrieve(query_embedding, document_count):
+    return rag_pipeline.get_component("retriever").run(query_embedding=list(query_embedding))["documents"]
+
 # ==========================================
 # 3. Sidebar: File Upload
 # ==========================================
@@ -99,17 +204,16 @@ with st.sidebar:
     if uploaded_file is not None:
         if st.button("Start Indexing"):
             with st.spinner("Parsing, splitting, and indexing into Vector DB..."):
-                # Streamlit uploads are in-memory; we need to save to a temp file for Haystack to read
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    tmp_file_path = tmp_file.name
-
-                # Run Indexing Pipeline
-                indexing_pipeline.run({"converter": {"sources": [Path(tmp_file_path)]}})
-                
-                # Delete temporary file
-                os.remove(tmp_file_path)
-                
+                # Streamlit uploads are in-memory; the converter parses the bytes directly (no temp file)
+                indexing_pipeline.run({
+                    "chunk_cache": {
+                        "sources": [BytesIO(uploaded_file.getvalue())],
+                        "meta": {"file_path": uploaded_file.name}
+                    }
+                })
+                # Cached retrievals predate the new paper
+                retrieve.clear()
+
             st.success("✅ Paper successfully indexed! You can now ask questions.")
 
 # ==========================================
@@ -128,15 +232,35 @@ if prompt := st.chat_input("What do you want to ask about the paper?"):
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # 2. Call Haystack RAG pipeline
+    # 2. Call Haystack RAG components (cached embedding -> cached retrieval -> prompt -> LLM)
     with st.chat_message("assistant"):
         with st.spinner("AI is reading and thinking..."):
-            result = rag_pipeline.run({
-                "text_embedder": {"text": prompt},
-                "prompt_builder": {"question": prompt}
-            })
-            response = result['llm']['replies'][0]
-            st.markdown(response)
+            documents = retrieve(tuple(embed_question(prompt)), doc_store.count_documents())
+            llm_prompt = rag_pipeline.get_component("prompt_builder").run(question=prompt, documents=documents)["prompt"]
+
+        # Generate on a worker thread and stream tokens into the message as they arrive.
+        # The worker only queues tokens (Streamlit elements must be updated from the script thread);
+        # this loop renders whatever has arrived, so UI updates overlap with the network reads.
+        # The callback is passed per run because the cached generator is shared by all sessions.
+        tokens = queue.Queue()
+        future = get_llm_executor().submit(
+            rag_pipeline.get_component("llm").run,
+            prompt=llm_prompt,
+            streaming_callback=lambda chunk: tokens.put(chunk.content)
+        )
+        placeholder = st.empty()
+        streamed = []
+        while not (future.done() and tokens.empty()):
+            try:
+                streamed.append(tokens.get(timeout=0.05))
+            except queue.Empty:
+                continue
+            while not tokens.empty():
+                streamed.append(tokens.get_nowait())
+            placeholder.markdown("".join(streamed) + "▌")
+
+        response = future.result()["replies"][0]
+        placeholder.markdown(response)
     
     # 3. Save AI response
     st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
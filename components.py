@@ -0,0 +1,663 @@
+import hashlib
+import multiprocessing
+import os
+import pickle
+import re
+import sqlite3
+import threading
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import replace
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+import httpx
+import numpy as np
+from haystack import Document, component, logging
+from haystack.components.converters.utils import get_bytestream_from_source, normalize_metadata
+from haystack.components.preprocessors import DocumentCleaner
+from haystack.core.component.types import Variadic
+from haystack.dataclasses import ByteStream
+from haystack.lazy_imports import LazyImport
+from haystack_integrations.components.embedders.ollama import OllamaTextEmbedder
+from haystack_integrations.components.generators.ollama import OllamaGenerator
+from ollama import Client as OllamaClient
+from pypdf import PdfReader
+
+with LazyImport("Run 'pip install model2vec' to use EMBED_BACKEND=potion") as model2vec_import:
+    from model2vec import StaticModel
+
+logger = logging.getLogger(__name__)
+
+# Embedding backend for indexing and queries: "ollama" (nomic-embed-text over HTTP) or "potion"
+# (a Model2Vec static model run in-process). The Qdrant collection must be re-created when switching.
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "ollama")
+EMBEDDING_DIM = 256 if EMBED_BACKEND == "potion" else 768
+
+# Layout of the "my_paper_db" collection, shared by every script that may create it (it only applies then):
+# - only int8-quantized vectors stay in RAM (4x smaller); full vectors and the HNSW graph live on disk,
+#   and Qdrant rescores the top candidates with the originals
+# - payloads (chunk text and metadata) are read from disk too, and segments past 20k vectors are memory-mapped,
+#   so RAM use follows what queries touch rather than the size of the corpus
+QDRANT_COLLECTION_CONFIG = {
+    "embedding_dim": EMBEDDING_DIM,
+    "similarity": "cosine",
+    "on_disk": True,
+    "quantization_config": {"scalar": {"type": "int8", "quantile": 0.99, "always_ram": True}},
+    "on_disk_payload": True,
+    "hnsw_config": {"on_disk": True, "m": 16, "ef_construct": 128},
+    "optimizers_config": {"memmap_threshold": 20000},
+}
+
+
+# ==========================================
+# Converters
+# ==========================================
+
+# Worker processes for PDF text extraction, created on first use and shared by every converter
+_pdf_executor: ProcessPoolExecutor | None = None
+_pdf_executor_lock = threading.Lock()
+
+
+def _get_pdf_executor(max_workers: int) -> ProcessPoolExecutor:
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            # Spawn rather than fork: the Streamlit server is multi-threaded, and a forked worker can inherit
+            # a lock held by another thread and deadlock
+            _pdf_executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_executor
+
+
+def _discard_pdf_executor(executor: ProcessPoolExecutor):
+    # A pool with a crashed worker stays broken; drop it so the next conversion starts a fresh one
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is executor:
+            _pdf_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _to_bytestream(source: str | Path | ByteStream | bytes | BytesIO) -> ByteStream:
+    if isinstance(source, BytesIO):
+        source = source.getvalue()
+    return ByteStream(data=source) if isinstance(source, bytes) else get_bytestream_from_source(source)
+
+
+def _source_meta(stream: ByteStream, metadata: dict[str, Any]) -> dict[str, Any]:
+    merged_metadata = {**stream.meta, **metadata}
+    if file_path := stream.meta.get("file_path"):
+        merged_metadata["file_path"] = os.path.basename(file_path)
+    return merged_metadata
+
+
+def _extract_pages(data: bytes, start: int, end: int) -> list[str]:
+    reader = PdfReader(BytesIO(data))
+    return [reader.pages[i].extract_text() for i in range(start, end)]
+
+
+@component
+class ParallelPyPDFToDocument:
+    """
+    Convert PDFs to Documents, extracting page ranges in parallel worker processes.
+
+    Sources may be paths, ByteStreams, raw bytes or BytesIO, so uploads never touch the disk.
+    Pages are joined with form feeds in page order, like PyPDFToDocument.
+    """
+
+    def __init__(self, max_workers: int | None = None, min_pages_per_worker: int = 4):
+        self.max_workers = max_workers or min(os.cpu_count() or 1, 8)
+        self.min_pages_per_worker = min_pages_per_worker
+
+    @component.output_types(documents=list[Document])
+    def run(
+        self,
+        sources: list[str | Path | ByteStream | bytes | BytesIO],
+        meta: dict[str, Any] | list[dict[str, Any]] | None = None,
+    ):
+        documents = []
+        for source, metadata in zip(sources, normalize_metadata(meta, sources_count=len(sources))):
+            try:
+                stream = _to_bytestream(source)
+                text = "\f".join(self._extract_text(stream.data))
+            except Exception as error:
+                name = source if isinstance(source, (str, Path)) else metadata.get("file_path", "in-memory PDF")
+                logger.warning("Could not convert {source} to Document, skipping. {error}", source=name, error=error)
+                continue
+
+            documents.append(Document(content=text, meta=_source_meta(stream, metadata)))
+        return {"documents": documents}
+
+    def _extract_text(self, data: bytes) -> list[str]:
+        page_count = len(PdfReader(BytesIO(data)).pages)
+        workers = max(1, min(self.max_workers, page_count // self.min_pages_per_worker))
+        if workers == 1:
+            return _extract_pages(data, 0, page_count)
+
+        executor = _get_pdf_executor(self.max_workers)
+        bounds = [page_count * i // workers for i in range(workers + 1)]
+        try:
+            futures = [executor.submit(_extract_pages, data, bounds[i], bounds[i + 1]) for i in range(workers)]
+            return [text for future in futures for text in future.result()]
+        except BrokenProcessPool:
+            _discard_pdf_executor(executor)
+            raise
+
+
+# ==========================================
+# Preprocessors
+# ==========================================
+
+# Non-breaking spaces become plain spaces, zero-width spaces disappear
+_WS_TRANS = str.maketrans({"\u00a0": " ", "\u200b": ""})
+
+
+class FastDocumentCleaner(DocumentCleaner):
+    """
+    DocumentCleaner with whitespace handling done by str.split/join instead of re.sub.
+
+    Unlike the stock cleaner, runs of whitespace spanning several lines are not merged into one line:
+    page breaks ("\f") and line breaks are kept, since the splitter counts pages and AddSectionHeader
+    looks for headings line by line. Non-breaking and zero-width spaces are normalized as well.
+    """
+
+    def _remove_extra_whitespaces(self, text: str) -> str:
+        # translate() with a mapping is slow on long texts, so only pay for it when needed
+        if "\u00a0" in text or "\u200b" in text:
+            text = text.translate(_WS_TRANS)
+        return "\f".join(
+            ["\n".join([" ".join(line.split()) for line in page.split("\n")]) for page in text.split("\f")]
+        )
+
+    def _remove_empty_lines(self, text: str) -> str:
+        return "\f".join(["\n".join(filter(str.strip, page.split("\n"))) for page in text.split("\f")])
+
+
+def _content_hash(document: Document) -> str:
+    return hashlib.sha256((document.content or "").encode()).hexdigest()
+
+
+@component
+class DedupeBySHA256:
+    """Pass on only the first chunk for each distinct text; the others are returned as `duplicates`."""
+
+    @component.output_types(documents=list[Document], duplicates=dict[str, list[Document]])
+    def run(self, documents: list[Document]):
+        unique = {}
+        duplicates = {}
+        for doc in documents:
+            key = _content_hash(doc)
+            if key in unique:
+                duplicates.setdefault(key, []).append(doc)
+            else:
+                unique[key] = doc
+        return {"documents": list(unique.values()), "duplicates": duplicates}
+
+
+@component
+class ReplicateEmbeddings:
+    """Copy each embedded chunk's vector onto the duplicates DedupeBySHA256 held back."""
+
+    @component.output_types(documents=list[Document])
+    def run(self, documents: list[Document], duplicates: dict[str, list[Document]]):
+        copies = []
+        for doc in documents:
+            for duplicate in duplicates.get(_content_hash(doc), []):
+                copies.append(replace(duplicate, embedding=doc.embedding))
+        return {"documents": documents + copies}
+
+
+# A heading is a whole line: "# Title", "3.2 Attention", "ABSTRACT" or an unnumbered paper section
+_HEADING = re.compile(
+    r"#+\s+(?P<markdown>.+)"
+    r"|(?P<numbered>\d{1,2}(?:\.\d{1,2})*\s+[A-Z][A-Za-z ,:-]{1,60})"
+    r"|(?P<caps>[A-Z][A-Z ]{3,60})"
+    r"|(?P<named>Abstract|Acknowledge?ments|References|Appendix)"
+)
+
+
+def _find_headings(text: str) -> tuple[list[int], list[str]]:
+    offsets, titles = [], []
+    for line in re.finditer(r"[^\n\f]+", text):
+        match = _HEADING.fullmatch(line.group().strip())
+        if match:
+            offsets.append(line.start())
+            titles.append(match.group(match.lastgroup).strip())
+    return offsets, titles
+
+
+@component
+class AddSectionHeader:
+    """
+    Prefix each chunk with the heading of the section it starts in ("Section: {header}\n\n{chunk}").
+
+    The prefix is only meant for the embedding: the original chunk text is kept in meta["raw"] for the prompt.
+    `sources` are the documents the chunks were split from, matched through meta["source_id"].
+    """
+
+    @component.output_types(documents=list[Document])
+    def run(self, documents: list[Document], sources: list[Document]):
+        headings = {source.id: _find_headings(source.content or "") for source in sources}
+        enriched = []
+        for doc in documents:
+            offsets, titles = headings.get(doc.meta.get("source_id"), ([], []))
+            i = bisect_right(offsets, doc.meta.get("split_idx_start", 0)) - 1
+            content = f"Section: {titles[i]}\n\n{doc.content}" if i >= 0 else doc.content
+            enriched.append(replace(doc, content=content, meta={**doc.meta, "raw": doc.content}))
+        return {"documents": enriched}
+
+
+@component
+class FastJoiner:
+    """
+    Concatenate document lists, keeping the best-scored copy of repeated documents.
+
+    A drop-in for DocumentJoiner(join_mode="concatenate") that merges pipeline branches without sorting:
+    documents keep their input order.
+    """
+
+    @component.output_types(documents=list[Document])
+    def run(self, documents: Variadic[list[Document]]):
+        best = {}
+        for docs in documents:
+            for doc in docs:
+                kept = best.get(doc.id)
+                if kept is None or (doc.score or 0) > (kept.score or 0):
+                    best[doc.id] = doc
+        return {"documents": list(best.values())}
+
+
+# ==========================================
+# Caches
+# ==========================================
+
+class EmbeddingCache:
+    """SQLite store of chunk embeddings keyed by sha256(model + text), vectors kept as raw little-endian float32."""
+
+    def __init__(self, path: str = "./cache/embeddings.sqlite3"):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by all Streamlit sessions, so guard it with a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS emb(k BLOB PRIMARY KEY, v BLOB)")
+
+    @staticmethod
+    def key(model: str, text: str) -> bytes:
+        return hashlib.sha256(f"{model}\0{text}".encode()).digest()
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, list[float]]:
+        found = {}
+        with self._lock:
+            # Stay under SQLite's limit on bound parameters per statement
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(f"SELECT k, v FROM emb WHERE k IN ({placeholders})", chunk)
+                for k, v in rows:
+                    found[k] = np.frombuffer(v, dtype="<f4").tolist()
+        return found
+
+    def put_many(self, items: dict[bytes, list[float]]):
+        rows = [(k, np.asarray(v, dtype="<f4").tobytes()) for k, v in items.items()]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO emb(k, v) VALUES (?, ?)", rows)
+
+
+class ChunkCache:
+    """Pickled post-splitter chunks on disk, one file per PDF content hash and splitter settings."""
+
+    def __init__(self, cache_dir: str = "./cache/chunks"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Known keys, so a miss doesn't need to touch the disk
+        self._keys = {path.stem for path in self.cache_dir.glob("*.pkl")}
+
+    def get(self, key: str) -> list[Document] | None:
+        if key not in self._keys:
+            return None
+        try:
+            with open(self.cache_dir / f"{key}.pkl", "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, AttributeError, EOFError) as error:
+            # Deleted behind our back, truncated, or pickled by an incompatible haystack version: treat as a miss
+            logger.warning("Ignoring unreadable chunk cache entry {key}. {error}", key=key, error=error)
+            self._keys.discard(key)
+            return None
+
+    def put(self, key: str, documents: list[Document]):
+        # Write to a temp file first so a crash never leaves a truncated entry behind
+        tmp_path = self.cache_dir / f"{key}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(documents, f)
+        os.replace(tmp_path, self.cache_dir / f"{key}.pkl")
+        self._keys.add(key)
+
+
+def _chunk_id(content: str | None, meta: dict[str, Any]) -> str:
+    """
+    Id of a chunk, the same whether it was just split or comes from the chunk cache, so re-indexing a
+    paper overwrites its points. The ids of the source document and the neighbouring splits are left
+    out: they differ between copies of the same PDF under different names.
+    """
+    meta = {key: value for key, value in meta.items() if key not in ("source_id", "_split_overlap")}
+    return Document(content=content, meta=meta).id
+
+
+@component
+class CachedChunks:
+    """
+    First step of the indexing pipeline: emit cached chunks for PDFs that were already split.
+
+    Cache hits go out as `documents`; the remaining PDFs go out as `sources`/`meta` for the converter,
+    tagged with their cache key so StoreChunks can save the splitter output. When every PDF is a hit
+    the converter, cleaner and splitter don't run at all.
+    """
+
+    def __init__(
+        self,
+        cache: ChunkCache,
+        split_length: int,
+        split_overlap: int,
+        respect_sentence_boundary: bool = False,
+    ):
+        self.cache = cache
+        self.split_length = split_length
+        self.split_overlap = split_overlap
+        self.respect_sentence_boundary = respect_sentence_boundary
+
+    @component.output_types(documents=list[Document], sources=list[ByteStream], meta=list[dict[str, Any]])
+    def run(
+        self,
+        sources: list[str | Path | ByteStream | bytes | BytesIO],
+        meta: dict[str, Any] | list[dict[str, Any]] | None = None,
+    ):
+        hits = []
+        misses = []
+        miss_meta = []
+        for source, metadata in zip(sources, normalize_metadata(meta, sources_count=len(sources))):
+            try:
+                stream = _to_bytestream(source)
+            except Exception as error:
+                name = source if isinstance(source, (str, Path)) else metadata.get("file_path", "in-memory PDF")
+                logger.warning("Could not read {source}, skipping. {error}", source=name, error=error)
+                continue
+            key = f"{hashlib.sha256(stream.data).hexdigest()}-{self.split_length}-{self.split_overlap}"
+            if self.respect_sentence_boundary:
+                key += "-sentences"
+
+            chunks = self.cache.get(key)
+            if chunks is None:
+                misses.append(stream)
+                miss_meta.append({**metadata, "chunk_cache_key": key})
+            else:
+                # The same PDF may come back under another name: use this file's metadata
+                file_meta = _source_meta(stream, metadata)
+                for chunk in chunks:
+                    chunk_meta = {**chunk.meta, **file_meta}
+                    hits.append(replace(chunk, id=_chunk_id(chunk.content, chunk_meta), meta=chunk_meta))
+
+        # Only emit the outputs we have, so the branch without input is skipped
+        output = {}
+        if hits:
+            output["documents"] = hits
+        if misses:
+            output["sources"] = misses
+            output["meta"] = miss_meta
+        return output
+
+
+@component
+class StoreChunks:
+    """Save freshly split chunks under the cache key CachedChunks attached, then pass them on."""
+
+    def __init__(self, cache: ChunkCache):
+        self.cache = cache
+
+    @component.output_types(documents=list[Document])
+    def run(self, documents: list[Document]):
+        # Identical PDFs share a cache key, so group by source document too and save one copy per key
+        by_source = {}
+        for doc in documents:
+            meta = dict(doc.meta)
+            key = meta.pop("chunk_cache_key", None)
+            chunk = replace(doc, id=_chunk_id(doc.content, meta), meta=meta)
+            by_source.setdefault((key, meta.get("source_id")), []).append(chunk)
+
+        saved = set()
+        for (key, _), chunks in by_source.items():
+            if key is not None and key not in saved:
+                self.cache.put(key, chunks)
+                saved.add(key)
+        return {"documents": [doc for chunks in by_source.values() for doc in chunks]}
+
+
+# ==========================================
+# Embedders
+# ==========================================
+
+def create_ollama_http_client(base_url: str = "http://localhost:11434") -> httpx.Client:
+    """Keep-alive connection pool for Ollama calls (HTTP/2 where the server offers it)."""
+    # Same default headers as ollama.Client builds: JSON content type, user agent, and
+    # Authorization from OLLAMA_API_KEY when it is set
+    reference = OllamaClient(host=base_url)
+    headers = dict(reference._client.headers)
+    reference._client.close()
+    return httpx.Client(
+        base_url=base_url,
+        headers=headers,
+        follow_redirects=True,
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=40, max_connections=100, keepalive_expiry=30),
+        timeout=httpx.Timeout(300.0, connect=10.0),
+    )
+
+
+# Default pool for embedders that aren't given a client
+_http_client = create_ollama_http_client()
+
+# Batch size ceiling learned from failed /api/embed calls, shared by every embedder in this process
+# so later runs start from a size the Ollama host is known to handle.
+_embed_batch_ceiling: int | None = None
+
+
+@component
+class BatchedOllamaDocumentEmbedder:
+    """
+    Embed documents through Ollama's /api/embed endpoint, one HTTP call per batch of chunks.
+
+    The batch size defaults to the OLLAMA_EMBED_BATCH_SIZE environment variable (or 32). When a batch
+    fails with a 5xx or a read timeout it is split in half and retried, down to `min_batch_size`.
+
+    Batches are posted concurrently by `max_workers` threads. Set OLLAMA_URLS to a comma-separated list
+    of Ollama servers to spread the batches across them round-robin.
+
+    With an EmbeddingCache, only chunks missing from the cache are sent to Ollama. Pass `client` to share
+    an httpx.Client (and its open connections) with other components.
+    """
+
+    def __init__(
+        self,
+        model: str = "nomic-embed-text",
+        url: str = "http://localhost:11434",
+        batch_size: int | None = None,
+        min_batch_size: int = 4,
+        max_workers: int = 4,
+        timeout: int = 120,
+        keep_alive: float | str | None = None,
+        cache: EmbeddingCache | None = None,
+        client: httpx.Client | None = None,
+    ):
+        self.model = model
+        self.url = url
+        self.urls = [u.strip().rstrip("/") for u in os.getenv("OLLAMA_URLS", url).split(",") if u.strip()]
+        self.batch_size = batch_size or int(os.getenv("OLLAMA_EMBED_BATCH_SIZE", "32"))
+        self.min_batch_size = min_batch_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.cache = cache
+        self.client = client
+
+    @component.output_types(documents=list[Document], meta=dict[str, Any])
+    def run(self, documents: list[Document]):
+        texts = [doc.content or "" for doc in documents]
+        if self.cache is None:
+            embeddings = self._embed_texts(texts)
+        else:
+            keys = [self.cache.key(self.model, text) for text in texts]
+            cached = self.cache.get_many(keys)
+            misses = [i for i, key in enumerate(keys) if key not in cached]
+            fresh = dict(zip((keys[i] for i in misses), self._embed_texts([texts[i] for i in misses])))
+            self.cache.put_many(fresh)
+            embeddings = [cached[key] if key in cached else fresh[key] for key in keys]
+
+        documents = [replace(doc, embedding=emb) for doc, emb in zip(documents, embeddings, strict=True)]
+        return {"documents": documents, "meta": {"model": self.model}}
+
+    def _embed_texts(self, texts: list[str]) -> list[list[float]]:
+        batch_size = min(self.batch_size, _embed_batch_ceiling or self.batch_size)
+        batches = [texts[start : start + batch_size] for start in range(0, len(texts), batch_size)]
+
+        # Results come back in batch order, so embeddings line up with the input documents
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            urls = [self.urls[i % len(self.urls)] for i in range(len(batches))]
+            results = executor.map(self._embed_adaptive, batches, urls)
+            return [emb for batch_embeddings in results for emb in batch_embeddings]
+
+    def _embed_adaptive(self, texts: list[str], url: str) -> list[list[float]]:
+        global _embed_batch_ceiling
+        try:
+            return self._embed_batch(texts, url)
+        except (httpx.HTTPStatusError, httpx.ReadTimeout) as error:
+            server_error = isinstance(error, httpx.ReadTimeout) or error.response.status_code >= 500
+            if not server_error or len(texts) <= self.min_batch_size:
+                raise
+
+        half = max(len(texts) // 2, self.min_batch_size)
+        _embed_batch_ceiling = min(half, _embed_batch_ceiling or half)
+        return self._embed_adaptive(texts[:half], url) + self._embed_adaptive(texts[half:], url)
+
+    def _embed_batch(self, texts: list[str], url: str) -> list[list[float]]:
+        payload = {"model": self.model, "input": texts}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        response = (self.client or _http_client).post(f"{url}/api/embed", json=payload, timeout=self.timeout)
+        # Older Ollama servers don't know /api/embed: fall back to the one-text-per-call route
+        if response.status_code == 404:
+            return self._embed_legacy(texts, url)
+        response.raise_for_status()
+
+        embeddings = response.json().get("embeddings")
+        if embeddings is None:
+            return self._embed_legacy(texts, url)
+        return embeddings
+
+    def _embed_legacy(self, texts: list[str], url: str) -> list[list[float]]:
+        embeddings = []
+        for text in texts:
+            payload = {"model": self.model, "prompt": text}
+            if self.keep_alive is not None:
+                payload["keep_alive"] = self.keep_alive
+            response = (self.client or _http_client).post(f"{url}/api/embeddings", json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            embeddings.append(response.json()["embedding"])
+        return embeddings
+
+
+def _check_shared_client(client: httpx.Client, kwargs: dict[str, Any]):
+    # Requests go to the shared client's base_url with its timeout, so conflicting settings would be ignored
+    if "timeout" in kwargs:
+        raise ValueError("timeout can't be combined with a shared client, whose own timeout applies")
+    url = kwargs.get("url", "http://localhost:11434")
+    if str(client.base_url).rstrip("/") != url.rstrip("/"):
+        raise ValueError(f"url {url} doesn't match the shared client's base_url {client.base_url}")
+
+
+@component
+class SharedClientOllamaTextEmbedder(OllamaTextEmbedder):
+    """
+    OllamaTextEmbedder that sends its requests through the given httpx.Client instead of its own.
+
+    `url` must match the client's base_url, and the client's timeout applies (passing `timeout` is an error).
+    """
+
+    def __init__(self, *, client: httpx.Client | None = None, **kwargs):
+        if client is not None:
+            _check_shared_client(client, kwargs)
+        OllamaTextEmbedder.__init__(self, **kwargs)
+        if client is not None:
+            # ollama.Client keeps its httpx client in `_client` and requests paths relative to its base_url
+            self._client._client = client
+
+
+@component
+class PotionDocumentEmbedder:
+    """
+    Embed documents in-process with a Model2Vec static model (e.g. minishlab/potion-base-8M, 256-dim).
+
+    Each token is a row lookup in a static embedding matrix, mean-pooled per chunk: no transformer
+    forward pass and no HTTP round trip, at some cost in retrieval quality compared to nomic-embed-text.
+    """
+
+    def __init__(self, model: str = "minishlab/potion-base-8M", batch_size: int = 1024):
+        model2vec_import.check()
+        self.model = model
+        self.batch_size = batch_size
+        self._static_model = None
+
+    def warm_up(self):
+        if self._static_model is None:
+            self._static_model = StaticModel.from_pretrained(self.model)
+
+    @component.output_types(documents=list[Document], meta=dict[str, Any])
+    def run(self, documents: list[Document]):
+        # Also called outside a Pipeline (the app runs components directly), so load on first use
+        self.warm_up()
+        vectors = self._static_model.encode([doc.content or "" for doc in documents], batch_size=self.batch_size)
+        documents = [replace(doc, embedding=vector.tolist()) for doc, vector in zip(documents, vectors, strict=True)]
+        return {"documents": documents, "meta": {"model": self.model}}
+
+
+@component
+class PotionTextEmbedder:
+    """Embed a query with the same Model2Vec static model as PotionDocumentEmbedder."""
+
+    def __init__(self, model: str = "minishlab/potion-base-8M"):
+        model2vec_import.check()
+        self.model = model
+        self._static_model = None
+
+    def warm_up(self):
+        if self._static_model is None:
+            self._static_model = StaticModel.from_pretrained(self.model)
+
+    @component.output_types(embedding=list[float], meta=dict[str, Any])
+    def run(self, text: str):
+        self.warm_up()
+        return {"embedding": self._static_model.encode([text])[0].tolist(), "meta": {"model": self.model}}
+
+
+# ==========================================
+# Generators
+# ==========================================
+
+@component
+class SharedClientOllamaGenerator(OllamaGenerator):
+    """
+    OllamaGenerator that sends its requests through the given httpx.Client instead of its own.
+
+    `url` must match the client's base_url, and the client's timeout applies (passing `timeout` is an error).
+    """
+
+    def __init__(self, *, client: httpx.Client | None = None, **kwargs):
+        if client is not None:
+            _check_shared_client(client, kwargs)
+        OllamaGenerator.__init__(self, **kwargs)
+        if client is not None:
+            self._client._client = client
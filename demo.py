@@ -1,17 +1,29 @@
 import os
 from haystack import Pipeline, Document
-from haystack.document_stores.in_memory import InMemoryDocumentStore
 from haystack.components.builders.prompt_builder import PromptBuilder
 from haystack_integrations.components.generators.ollama import OllamaGenerator
 from haystack_integrations.components.embedders.ollama import OllamaDocumentEmbedder, OllamaTextEmbedder
-from haystack.components.retrievers.in_memory import InMemoryEmbeddingRetriever, InMemoryBM25Retriever
-from haystack.components.joiners import DocumentJoiner
+from haystack_integrations.components.embedders.fastembed import (
+    FastembedSparseDocumentEmbedder,
+    FastembedSparseTextEmbedder,
+)
+from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
+from haystack_integrations.components.retrievers.qdrant import QdrantHybridRetriever
 
 # ==========================================
 # 1. Initialize Document Store
-# We need it to support BOTH Embeddings (Cosine) and Keywords
+# We need it to support BOTH Embeddings (Cosine) and Keywords.
+# Qdrant stores a dense vector and a sparse BM25 vector per document in the same collection.
+# ":memory:" runs Qdrant in-process, so the demo needs no Docker container.
 # ==========================================
-document_store = InMemoryDocumentStore(embedding_similarity_function="cosine")
+document_store = QdrantDocumentStore(
+    ":memory:",
+    index="demo",
+    embedding_dim=768,
+    use_sparse_embeddings=True,
+    sparse_idf=True,  # BM25 needs Qdrant to apply IDF weighting at query time
+    recreate_index=True
+)
 
 # ==========================================
 # 2. Data Preparation
@@ -27,11 +39,16 @@ raw_docs = [
 
 print("1. Indexing Documents...")
 
-# Create Embeddings for the docs
+# Create Sparse (BM25) Embeddings for the docs
+sparse_doc_embedder = FastembedSparseDocumentEmbedder(model="Qdrant/bm25")
+sparse_doc_embedder.warm_up()
+docs_with_embeddings = sparse_doc_embedder.run(raw_docs)["documents"]
+
+# Create Dense Embeddings for the docs
 doc_embedder = OllamaDocumentEmbedder(model="nomic-embed-text", url="http://localhost:11434")
-docs_with_embeddings = doc_embedder.run(raw_docs)["documents"]
+docs_with_embeddings = doc_embedder.run(docs_with_embeddings)["documents"]
 
-# Write to store (BM25 automatically builds its index here too)
+# Write to store (both vectors go into the same Qdrant point)
 document_store.write_documents(docs_with_embeddings)
 print("   Done! Documents indexed.")
 
@@ -39,17 +56,16 @@ print("   Done! Documents indexed.")
 # 3. Initialize Components for Hybrid Search
 # ==========================================
 
-# A. Components for Vector Search (Semantic)
+# A. Query Embedder for Vector Search (Semantic)
 text_embedder = OllamaTextEmbedder(model="nomic-embed-text", url="http://localhost:11434")
-embedding_retriever = InMemoryEmbeddingRetriever(document_store=document_store)
 
-# B. Components for Keyword Search (Exact Match)
-bm25_retriever = InMemoryBM25Retriever(document_store=document_store)
+# B. Query Embedder for Keyword Search (Exact Match)
+sparse_text_embedder = FastembedSparseTextEmbedder(model="Qdrant/bm25")
 
-# C. The Joiner (The Glue)
-# This merges results from both retrievers.
-# If both find the same document, it boosts its score.
-document_joiner = DocumentJoiner(join_mode="concatenate", top_k=5)
+# C. The Hybrid Retriever
+# Sends both query vectors to Qdrant in ONE request; Qdrant scores dense and sparse (BM25)
+# natively and merges the two result lists with Reciprocal Rank Fusion.
+retriever = QdrantHybridRetriever(document_store=document_store, top_k=5)
 
 # D. Prompt & LLM
 template = """
@@ -63,29 +79,30 @@ Question: {{ question }}
 Answer:
 """
 prompt_builder = PromptBuilder(template=template)
-generator = OllamaGenerator(model="phi3", url="http://localhost:11434")
+# Q4_K_M quantized Phi-3 (pull it first: `ollama pull phi3:3.8b-mini-4k-instruct-q4_K_M`)
+generator = OllamaGenerator(
+    model="phi3:3.8b-mini-4k-instruct-q4_K_M",
+    url="http://localhost:11434",
+    generation_kwargs={"num_ctx": 2048, "num_batch": 512}
+)
 
 # ==========================================
-# 4. Build the Hybrid Pipeline (Y-Shape)
+# 4. Build the Hybrid Pipeline
 # ==========================================
 pipeline = Pipeline()
 pipeline.add_component("text_embedder", text_embedder)
-pipeline.add_component("embedding_retriever", embedding_retriever)
-pipeline.add_component("bm25_retriever", bm25_retriever)
-pipeline.add_component("joiner", document_joiner)
+pipeline.add_component("sparse_text_embedder", sparse_text_embedder)
+pipeline.add_component("retriever", retriever)
 pipeline.add_component("prompt_builder", prompt_builder)
 pipeline.add_component("llm", generator)
 
 # Connect the Logic
-# Branch 1: Vector Search
-pipeline.connect("text_embedder.embedding", "embedding_retriever.query_embedding")
-pipeline.connect("embedding_retriever", "joiner")
-
-# Branch 2: Keyword Search (BM25)
-pipeline.connect("bm25_retriever", "joiner")
+# Both query vectors (Semantic + Keyword) feed the single hybrid retriever
+pipeline.connect("text_embedder.embedding", "retriever.query_embedding")
+pipeline.connect("sparse_text_embedder.sparse_embedding", "retriever.query_sparse_embedding")
 
-# Merge & Generate
-pipeline.connect("joiner", "prompt_builder.documents")
+# Generate
+pipeline.connect("retriever", "prompt_builder.documents")
 pipeline.connect("prompt_builder", "llm")
 
 # ==========================================
@@ -97,8 +114,8 @@ question = "What is the candidate's reference ID and what does he specialize in?
 print(f"\n2. Processing Hybrid Question: '{question}'...")
 
 result = pipeline.run({
-    "text_embedder": {"text": question},       # Input for Vector Search
-    "bm25_retriever": {"query": question},     # Input for Keyword Search
+    "text_embedder": {"text": question},          # Input for Vector Search
+    "sparse_text_embedder": {"text": question},   # Input for Keyword Search
     "prompt_builder": {"question": question}   # Input for LLM
 })
 
@@ -1,82 +1,153 @@
 import os
+import sys
+from glob import glob
 from pathlib import Path
 from haystack import Pipeline
-from haystack.components.converters import PyPDFToDocument
-from haystack.components.preprocessors import DocumentSplitter, DocumentCleaner
+from haystack.components.preprocessors import DocumentSplitter
 from haystack.components.writers import DocumentWriter
 from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
-from haystack_integrations.components.embedders.ollama import OllamaDocumentEmbedder
-
-# ==========================================
-# 1. Define File Paths
-# ==========================================
-# Ensure there is a file named "paper.pdf" in your current directory.
-# You can use a list to process multiple files if needed.
-pdf_file_path = [Path("./NIPS-2017-attention-is-all-you-need-Paper.pdf")]
-
-# ==========================================
-# 2. Initialize Qdrant Document Store
-# ==========================================
-document_store = QdrantDocumentStore(
-    url="http://localhost:6333",
-    index="my_paper_db",  # We create a specific index for research papers
-    recreate_index=True,  # True = Overwrite previous data (Good for testing)
-    embedding_dim=768,    # Must match the model dimension (nomic-embed-text)
-    similarity="cosine"
+from components import (
+    AddSectionHeader,
+    BatchedOllamaDocumentEmbedder,
+    CachedChunks,
+    ChunkCache,
+    DedupeBySHA256,
+    EMBED_BACKEND,
+    EmbeddingCache,
+    FastDocumentCleaner,
+    FastJoiner,
+    ParallelPyPDFToDocument,
+    PotionDocumentEmbedder,
+    QDRANT_COLLECTION_CONFIG,
+    ReplicateEmbeddings,
+    StoreChunks,
 )
 
-# ==========================================
-# 3. Initialize Components
-# ==========================================
 
-# A. Converter: specifically designed to extract text from PDF files
-converter = PyPDFToDocument()
+def main():
+    # ==========================================
+    # 1. Define File Paths
+    # ==========================================
+    # Usage: python index_pdf.py paper1.pdf paper2.pdf ...
+    # Without arguments, every PDF in ./papers is indexed (or the bundled paper if that folder is empty).
+    # All files go through a single pipeline run, so Ollama stays loaded and embedding batches stay full.
+    files = sys.argv[1:] or sorted(glob("./papers/*.pdf")) or ["./NIPS-2017-attention-is-all-you-need-Paper.pdf"]
+    pdf_file_path = [Path(p) for p in files]
 
-# B. Cleaner: PDF extraction often contains noise (headers, footers, page numbers)
-# This component helps clean up the text before processing.
-cleaner = DocumentCleaner(
-    remove_empty_lines=True,
-    remove_extra_whitespaces=True,
-    remove_repeated_substrings=False
-)
+    # ==========================================
+    # 2. Initialize Qdrant Document Store
+    # ==========================================
+    document_store = QdrantDocumentStore(
+        url="http://localhost:6333",
+        index="my_paper_db",  # We create a specific index for research papers
+        recreate_index=True,  # True = Overwrite previous data (Good for testing)
+        # Embedding size (768 nomic-embed-text, 256 potion), int8 quantization and on-disk layout
+        **QDRANT_COLLECTION_CONFIG
+    )
+
+    # ==========================================
+    # 3. Initialize Components
+    # ==========================================
+
+    # A. Chunk Cache: PDFs that were already split (same content, same splitter settings)
+    # skip the converter, cleaner and splitter. 'store_chunks' saves new splits and 'chunks' merges both paths.
+    chunk_cache = ChunkCache("./cache/chunks")
+    cached_chunks = CachedChunks(chunk_cache, split_length=250, split_overlap=50, respect_sentence_boundary=True)
+    store_chunks = StoreChunks(chunk_cache)
+    chunks = FastJoiner()
+
+    # B. Converter: specifically designed to extract text from PDF files
+    # Page ranges are extracted in parallel worker processes, so long papers convert in a fraction of the time.
+    converter = ParallelPyPDFToDocument()
+
+    # C. Cleaner: PDF extraction often contains noise (headers, footers, page numbers)
+    # This component helps clean up the text before processing.
+    # Whitespace is collapsed with plain string operations instead of regexes (page and line breaks are kept).
+    cleaner = FastDocumentCleaner(
+        remove_empty_lines=True,
+        remove_extra_whitespaces=True,
+        remove_repeated_substrings=False
+    )
+
+    # D. Splitter: Research papers are long, so we must chunk them.
+    # 'respect_sentence_boundary' ensures we don't cut a sentence in half.
+    splitter = DocumentSplitter(
+        split_by="word",
+        split_length=250,    
+        split_overlap=50,
+        respect_sentence_boundary=True 
+    )
+
+    # E. Section Headers: Each chunk is prefixed with the heading of the section it starts in ("3.2 Attention"),
+    # so its embedding knows the context. The original text stays in meta["raw"] and is what the LLM sees.
+    section_header = AddSectionHeader()
+
+    # F. Deduplication: Identical chunks (repeated headers, footers, boilerplate) are embedded only once.
+    # 'dedupe' holds back the copies and 'replicate' gives them the embedding of their first occurrence.
+    dedupe = DedupeBySHA256()
+    replicate = ReplicateEmbeddings()
+
+    # G. Embedder: Converts text chunks into vectors
+    # Chunks are sent to Ollama in batches, so one HTTP call embeds many chunks at once.
+    # The batch size comes from OLLAMA_EMBED_BATCH_SIZE (default 32) and shrinks automatically if Ollama struggles.
+    # Embeddings are cached on disk, so re-indexing the same paper only embeds chunks that changed.
+    # With EMBED_BACKEND=potion, a static Model2Vec model embeds in-process instead (much faster on CPU).
+    if EMBED_BACKEND == "potion":
+        embedder = PotionDocumentEmbedder(model="minishlab/potion-base-8M")
+    else:
+        embedder = BatchedOllamaDocumentEmbedder(
+            model="nomic-embed-text",
+            url="http://localhost:11434",
+            cache=EmbeddingCache("./cache/embeddings.sqlite3")
+        )
+
+    # H. Writer: Writes the processed documents into the Qdrant database
+    writer = DocumentWriter(document_store=document_store)
+
+    # ==========================================
+    # 4. Build the Indexing Pipeline
+    # ==========================================
+    pipeline = Pipeline()
+    pipeline.add_component("chunk_cache", cached_chunks)
+    pipeline.add_component("converter", converter)
+    pipeline.add_component("cleaner", cleaner)
+    pipeline.add_component("splitter", splitter)
+    pipeline.add_component("section_header", section_header)
+    pipeline.add_component("store_chunks", store_chunks)
+    pipeline.add_component("chunks", chunks)
+    pipeline.add_component("dedupe", dedupe)
+    pipeline.add_component("embedder", embedder)
+    pipeline.add_component("replicate", replicate)
+    pipeline.add_component("writer", writer)
+
+    # Connect the components in logical order
+    pipeline.connect("chunk_cache.sources", "converter.sources")
+    pipeline.connect("chunk_cache.meta", "converter.meta")
+    pipeline.connect("converter", "cleaner")
+    pipeline.connect("cleaner", "splitter")
+    pipeline.connect("cleaner", "section_header.sources")
+    pipeline.connect("splitter", "section_header.documents")
+    pipeline.connect("section_header", "store_chunks")
+    pipeline.connect("chunk_cache.documents", "chunks")
+    pipeline.connect("store_chunks", "chunks")
+    pipeline.connect("chunks", "dedupe")
+    pipeline.connect("dedupe.documents", "embedder.documents")
+    pipeline.connect("dedupe.duplicates", "replicate.duplicates")
+    pipeline.connect("embedder.documents", "replicate.documents")
+    pipeline.connect("replicate", "writer")
+
+    # ==========================================
+    # 5. Run the Pipeline (Ingestion)
+    # ==========================================
+    print(f"Processing {len(pdf_file_path)} file(s): {[str(p) for p in pdf_file_path]} ...")
+
+    # Note: The first component (chunk_cache) expects a dictionary with a 'sources' key
+    pipeline.run({"chunk_cache": {"sources": pdf_file_path}})
+
+    print(f"Success! {len(pdf_file_path)} paper(s) have been indexed into 'my_paper_db'.")
 
-# C. Splitter: Research papers are long, so we must chunk them.
-# 'respect_sentence_boundary' ensures we don't cut a sentence in half.
-splitter = DocumentSplitter(
-    split_by="word",
-    split_length=250,    
-    split_overlap=50,
-    respect_sentence_boundary=True 
-)
 
-# D. Embedder: Converts text chunks into vectors
-embedder = OllamaDocumentEmbedder(model="nomic-embed-text", url="http://localhost:11434")
-
-# E. Writer: Writes the processed documents into the Qdrant database
-writer = DocumentWriter(document_store=document_store)
-
-# ==========================================
-# 4. Build the Indexing Pipeline
-# ==========================================
-pipeline = Pipeline()
-pipeline.add_component("converter", converter)
-pipeline.add_component("cleaner", cleaner)
-pipeline.add_component("splitter", splitter)
-pipeline.add_component("embedder", embedder)
-pipeline.add_component("writer", writer)
-
-# Connect the components in logical order
-pipeline.connect("converter", "cleaner")
-pipeline.connect("cleaner", "splitter")
-pipeline.connect("splitter", "embedder")
-pipeline.connect("embedder", "writer")
-
-# ==========================================
-# 5. Run the Pipeline (Ingestion)
-# ==========================================
-print(f"Processing file: {pdf_file_path} ...")
-
-# Note: The converter expects a dictionary with a 'sources' key
-pipeline.run({"converter": {"sources": pdf_file_path}})
-
-print("Success! The paper has been indexed into 'my_paper_db'.")
\ No newline at end of file
+# The converter extracts pages in worker processes; on platforms that spawn them (Windows, macOS)
+# each worker re-imports this script, so indexing must only start from the main process.
+if __name__ == "__main__":
+    main()
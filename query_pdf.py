@@ -4,20 +4,35 @@ from haystack_integrations.components.generators.ollama import OllamaGenerator
 from haystack_integrations.components.embedders.ollama import OllamaTextEmbedder
 from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
 from haystack_integrations.components.retrievers.qdrant import QdrantEmbeddingRetriever
+from components import EMBED_BACKEND, PotionTextEmbedder, QDRANT_COLLECTION_CONFIG
 
 # 1. Connect to the Existing Document Store
 # Note: 'recreate_index' is NOT used here because we want to read existing data.
 document_store = QdrantDocumentStore(
     url="http://localhost:6333",
     index="my_paper_db", 
-    embedding_dim=768
+    # Same settings as the indexing scripts, in case this is the one that ends up creating the collection
+    **QDRANT_COLLECTION_CONFIG
 )
 
 # 2. Initialize Components
 # The embedder is used here to convert the USER QUERY into a vector.
-text_embedder = OllamaTextEmbedder(model="nomic-embed-text", url="http://localhost:11434")
-retriever = QdrantEmbeddingRetriever(document_store=document_store, top_k=3)
-generator = OllamaGenerator(model="phi3", url="http://localhost:11434", timeout=300)
+# It must match the backend used for indexing (EMBED_BACKEND).
+if EMBED_BACKEND == "potion":
+    text_embedder = PotionTextEmbedder(model="minishlab/potion-base-8M")
+else:
+    text_embedder = OllamaTextEmbedder(model="nomic-embed-text", url="http://localhost:11434")
+# Chunks are indexed with their section heading, so two of them are enough context (and a shorter prompt).
+retriever = QdrantEmbeddingRetriever(document_store=document_store, top_k=2)
+# Tokens are printed as soon as they are generated, so the answer starts appearing right away.
+# The model is the Q4_K_M quantized Phi-3 (pull it first: `ollama pull phi3:3.8b-mini-4k-instruct-q4_K_M`).
+generator = OllamaGenerator(
+    model="phi3:3.8b-mini-4k-instruct-q4_K_M",
+    url="http://localhost:11434",
+    timeout=300,
+    generation_kwargs={"num_ctx": 2048, "num_batch": 512},
+    streaming_callback=lambda chunk: print(chunk.content, end="", flush=True)
+)
 
 # 3. Define Prompt Template
 # This instructs the LLM on how to behave.
@@ -27,7 +42,7 @@ Be professional and accurate. If possible, cite specific details from the contex
 
 [Context]:
 {% for document in documents %}
-    {{ document.content }}
+    {{ document.meta.get("raw", document.content) }}
 {% endfor %}
 
 User Question: {{ question }}
@@ -55,11 +70,11 @@ while True:
         break
     
     print("AI is reading and thinking...")
-    result = pipeline.run({
+    print("--------------------------------------------------")
+    # The answer is streamed to the console by the generator's callback
+    pipeline.run({
         "text_embedder": {"text": user_input},
         "prompt_builder": {"question": user_input}
     })
-    
-    print("--------------------------------------------------")
-    print(result['llm']['replies'][0])
+    print()
     print("--------------------------------------------------")
\ No newline at end of file